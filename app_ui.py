@@ -14,14 +14,44 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox, colorchooser
 import threading
+import queue
 import os
+import re
+import time
+import copy
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-import json
 
-# Import the backend logic
-import processing_logic
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode("utf-8")
+
+    _loads = json.loads
+
+# The backend logic (processing_logic) pulls in the whole ML stack, so it is
+# imported in a background thread once the window is up (see App._preload_backend).
 
 CONFIG_FILE = "settings.json"
+MAX_LOG_LINES = 2000
+PROGRESS_MIN_INTERVAL = 1 / 30 # Seconds between repeated ticks of the same progress message
+_DIGITS_RE = re.compile(r'\d+')
+# Any http(s) URL goes to yt-dlp, which supports far more than YouTube; bare YouTube links are accepted too
+_URL_RE = re.compile(r'^(?:https?://|(?:[\w-]+\.)?(?:youtube(?:-nocookie)?\.com|youtu\.be)/)\S+$')
+STEMS = ("vocals", "drums", "bass", "other")
+KARAOKE_COLOR_KEYS = (("upcoming_color", "Upcoming"), ("highlight_color", "Highlight"),
+                      ("outline_color", "Outline"), ("shadow_color", "Shadow"))
 DEFAULT_SETTINGS = {
     "source_path": "",
     "output_path": str(Path.home() / "Downloads"),
@@ -30,6 +60,7 @@ DEFAULT_SETTINGS = {
     "speed_multiplier": 1.0,
     "normalize_volume": False,
     "generate_lyrics": True,
+    "burn_subtitles": True,
     "whisper_model": "large-v3",
     "karaoke_styles": {
         "font_name": "Arial",
@@ -47,6 +78,30 @@ DEFAULT_SETTINGS = {
     "window_geometry": "900x950"
 }
 
+def _settings_digest(data):
+    """Returns a short digest of serialized settings, used to detect changes."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _deep_merge(base, over):
+    """Recursively merges `over` into `base`, keeping default keys missing from nested dicts."""
+    for key, value in over.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+class CachedBoolVar(tk.BooleanVar):
+    """BooleanVar that mirrors its value in `cached` so reads skip the Tcl interpreter."""
+    def __init__(self, master=None, value=None, name=None):
+        super().__init__(master, value, name)
+        self.cached = bool(value)
+
+    def set(self, value):
+        # CTk checkboxes also update their variable through set(), so clicks stay in sync
+        super().set(value)
+        self.cached = bool(value)
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -54,43 +109,101 @@ class App(ctk.CTk):
 
         # --- Window Setup ---
         self.title("AI Media Processor Pro")
-        self.geometry(self.settings.get("window_geometry", DEFAULT_SETTINGS["window_geometry"]))
-        ctk.set_appearance_mode(self.settings.get("appearance_mode", DEFAULT_SETTINGS["appearance_mode"]))
+        self.geometry(self.settings["window_geometry"])
+        ctk.set_appearance_mode(self.settings["appearance_mode"])
         
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(3, weight=1) # Allow log to expand
 
         # --- State Variables ---
         self.cancel_flag = threading.Event()
-        self.processing_thread = None
-        self.interactive_widgets = []
+        self._backend = None
+        self._backend_error = None
+        self._backend_ready = threading.Event()
+        threading.Thread(target=self._preload_backend, daemon=True).start()
+        # One long-lived worker runs every processing job
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="processing")
+        self._future = None
+        self.interactive_widgets = ()
+        self._iw = []
+        self._widget_state = {}
+        self._export_option_ids = frozenset()
+        self._slider_pending = {}
+        self._last_export_mode = None
+        self._ui_queue = queue.Queue()
+        self._pending_progress = None
+        self._last_progress_key = None
+        self._last_posted_progress = (None, -1)
+        self._last_progress_template = None
+        self._last_progress_time = 0.0
+        self._progress_mode = "determinate"
+        self._log_queue = deque()
+        self._scroll_pending = False
 
         # --- Widgets ---
         self.create_widgets()
         self._create_context_menu()
         self.load_ui_from_settings()
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Worker-thread updates are posted to self._ui_queue and drained here on the main thread
+        self._ui_handlers = {
+            "progress": self._queue_progress,
+            "log": self.update_log,
+            "done": self._on_processing_done,
+        }
+        self.after(50, self._drain_queue)
 
     def _load_settings(self):
         """Loads settings from config file, filling gaps with defaults."""
+        settings = copy.deepcopy(DEFAULT_SETTINGS)
         if os.path.exists(CONFIG_FILE):
             try:
-                with open(CONFIG_FILE, 'r') as f:
-                    loaded_settings = json.load(f)
+                with open(CONFIG_FILE, 'rb') as f:
+                    loaded_settings = _loads(f.read())
                 # Merge loaded settings with defaults to ensure all keys exist
-                settings = DEFAULT_SETTINGS.copy()
-                settings.update(loaded_settings)
-                return settings
-            except (IOError, json.JSONDecodeError):
-                return DEFAULT_SETTINGS.copy()
-        return DEFAULT_SETTINGS.copy()
+                _deep_merge(settings, loaded_settings)
+            except (IOError, ValueError):
+                settings = copy.deepcopy(DEFAULT_SETTINGS)
+        # Remember what was loaded so unchanged settings are not rewritten on exit
+        self._settings_hash = _settings_digest(_dumps(settings))
+        return settings
+
+    def save_settings(self):
+        """Writes settings to the config file atomically, skipping the write if nothing changed."""
+        data = _dumps(self.settings)
+        digest = _settings_digest(data)
+        if digest == self._settings_hash:
+            return
+        tmp_file = CONFIG_FILE + ".tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, CONFIG_FILE)
+            self._settings_hash = digest
+        except IOError as e:
+            print(f"Failed to save settings: {e}")
+
+    def _preload_backend(self):
+        """Imports the processing backend off the UI thread so the window appears immediately."""
+        try:
+            import processing_logic
+            self._backend = processing_logic
+        except Exception as e:
+            self._backend_error = e
+        finally:
+            self._backend_ready.set()
 
     # ----------------- CONTEXT MENU -----------------
     def _create_context_menu(self):
         self.context_menu = tk.Menu(self, tearoff=0)
-        self.context_menu.add_command(label="Cut", command=lambda: self.focus_get().event_generate('<<Cut>>'))
-        self.context_menu.add_command(label="Copy", command=lambda: self.focus_get().event_generate('<<Copy>>'))
-        self.context_menu.add_command(label="Paste", command=lambda: self.focus_get().event_generate('<<Paste>>'))
+        self.context_menu.add_command(label="Cut", command=partial(self._gen, '<<Cut>>'))
+        self.context_menu.add_command(label="Copy", command=partial(self._gen, '<<Copy>>'))
+        self.context_menu.add_command(label="Paste", command=partial(self._gen, '<<Paste>>'))
+
+    def _gen(self, sequence):
+        widget = self.focus_get()
+        if widget is not None:
+            widget.event_generate(sequence)
 
     def _show_context_menu(self, event):
         event.widget.focus()
@@ -101,7 +214,16 @@ class App(ctk.CTk):
         self.speed_slider_label.configure(text=f"{float(value):.2f}x")
     
     def _update_mixer_label(self, stem, value):
-        getattr(self, f"{stem}_mixer_label").configure(text=f"{int(float(value) * 100)}%")
+        # Drag events arrive faster than the screen refreshes, so only the latest
+        # value per stem is kept and the labels are redrawn at most once per frame.
+        if not self._slider_pending:
+            self.after(16, self._flush_mixer_labels)
+        self._slider_pending[stem] = value
+
+    def _flush_mixer_labels(self):
+        pending, self._slider_pending = self._slider_pending, {}
+        for stem, value in pending.items():
+            self._mixer_labels[stem].configure(text=f"{int(float(value) * 100)}%")
         
     def _update_pitch_label(self, value):
         semitones = int(float(value))
@@ -110,29 +232,37 @@ class App(ctk.CTk):
     def _update_font_size_label(self, value):
         self.font_size_label.configure(text=f"{int(float(value))}pt")
         
+    def _set_swatch_color(self, swatch, color):
+        """Updates a color swatch's background only if it differs, avoiding a needless redraw."""
+        if swatch.cget("bg") != color:
+            swatch.configure(bg=color)
+
     def _pick_color(self, color_key, preview_widget):
         # Initial color should be the one currently stored
         initial_color = self.settings["karaoke_styles"][color_key]
         color_code = colorchooser.askcolor(initialcolor=initial_color, title=f"Choose {color_key.replace('_', ' ')} color")
         if color_code and color_code[1]:
             self.settings["karaoke_styles"][color_key] = color_code[1]
-            preview_widget.configure(fg_color=color_code[1])
+            self._set_swatch_color(preview_widget, color_code[1])
 
     def _on_export_mode_change(self, mode):
         """Enable/disable relevant export options based on the selected mode."""
+        if mode == self._last_export_mode:
+            return # Re-clicking the selected mode changes nothing
         is_audio_mode = (mode == "Audio Only")
         is_stems_mode = (mode == "Stems Only")
         
         # Enable format menu for Audio or Stems export
-        self.format_menu.configure(state=tk.NORMAL if (is_audio_mode or is_stems_mode) else tk.DISABLED)
+        self._set_widget_state(self.format_menu, tk.NORMAL if (is_audio_mode or is_stems_mode) else tk.DISABLED)
         
         # Enable stem checkboxes only for Stems export
-        if is_stems_mode and not any(self.stem_vars[s].get() for s in self.stem_vars):
+        if is_stems_mode and not any(var.cached for var in self.stem_vars.values()):
              for var in self.stem_vars.values():
                 var.set(True) # Pre-check all when switching to stem mode if none are checked
 
         for checkbox in self.stem_checkboxes.values():
-            checkbox.configure(state=tk.NORMAL if is_stems_mode else tk.DISABLED)
+            self._set_widget_state(checkbox, tk.NORMAL if is_stems_mode else tk.DISABLED)
+        self._last_export_mode = mode
 
     # ----------------- FILE PICKERS -----------------
     def browse_file(self):
@@ -151,6 +281,13 @@ class App(ctk.CTk):
             self.entry_output_path.insert(0, folder_path)
 
     # ----------------- MAIN WIDGETS -----------------
+    def _mk(self, cls, *args, interactive=True, **kwargs):
+        """Creates a widget and registers it to be disabled while processing."""
+        widget = cls(*args, **kwargs)
+        if interactive:
+            self._iw.append(widget)
+        return widget
+
     def create_widgets(self):
         # --- Top Frame (Input/Output) ---
         self.top_frame = ctk.CTkFrame(self)
@@ -158,148 +295,170 @@ class App(ctk.CTk):
         self.top_frame.grid_columnconfigure(1, weight=1)
         
         ctk.CTkLabel(self.top_frame, text="Source (URL or Local File):").grid(row=0, column=0, columnspan=3, padx=10, pady=(10,0), sticky="w")
-        self.entry_source = ctk.CTkEntry(self.top_frame, placeholder_text="https://www.youtube.com/watch?v=...")
+        self.entry_source = self._mk(ctk.CTkEntry, self.top_frame, placeholder_text="https://www.youtube.com/watch?v=...")
         self.entry_source.grid(row=1, column=0, columnspan=2, padx=(10, 5), pady=5, sticky="ew")
         self.entry_source.bind("<Button-3>", self._show_context_menu)
-        self.browse_button = ctk.CTkButton(self.top_frame, text="Browse...", command=self.browse_file)
+        self.browse_button = self._mk(ctk.CTkButton, self.top_frame, text="Browse...", command=self.browse_file)
         self.browse_button.grid(row=1, column=2, padx=(5, 10), pady=5)
         
         ctk.CTkLabel(self.top_frame, text="Output Folder:").grid(row=2, column=0, padx=10, pady=(10, 0), sticky="w")
-        self.entry_output_path = ctk.CTkEntry(self.top_frame)
+        self.entry_output_path = self._mk(ctk.CTkEntry, self.top_frame)
         self.entry_output_path.grid(row=3, column=0, columnspan=2, padx=(10, 5), pady=5, sticky="ew")
         self.entry_output_path.bind("<Button-3>", self._show_context_menu)
-        self.browse_output_button = ctk.CTkButton(self.top_frame, text="Browse...", command=self.browse_output_folder)
+        self.browse_output_button = self._mk(ctk.CTkButton, self.top_frame, text="Browse...", command=self.browse_output_folder)
         self.browse_output_button.grid(row=3, column=2, padx=(5, 10), pady=10)
-        self.interactive_widgets.extend([self.entry_source, self.browse_button, self.entry_output_path, self.browse_output_button])
 
         # --- Options Tabs ---
-        self.options_tab_view = ctk.CTkTabview(self, anchor="w")
+        # Tab contents are built the first time each tab is shown (see _build_tab).
+        self.options_tab_view = self._mk(ctk.CTkTabview, self, anchor="w", command=self._on_tab_change)
         self.options_tab_view.grid(row=1, column=0, padx=20, pady=5, sticky="ew")
         self.options_tab_view.add("Main Mixer")
         self.options_tab_view.add("Audio Effects")
         self.options_tab_view.add("Karaoke")
         self.options_tab_view.add("Exports")
-        self.interactive_widgets.append(self.options_tab_view)
+        self._tabs_built = set()
+        # Tab name -> (build, load settings, save settings)
+        self._tab_handlers = {
+            "Main Mixer": (self._build_mixer_tab, self._load_mixer_settings, self._save_mixer_settings),
+            "Audio Effects": (self._build_effects_tab, self._load_effects_settings, self._save_effects_settings),
+            "Karaoke": (self._build_karaoke_tab, self._load_karaoke_settings, self._save_karaoke_settings),
+            "Exports": (self._build_exports_tab, self._load_exports_settings, self._save_exports_settings),
+        }
 
-        # ---- Main Mixer Tab ----
-        mixer_tab = self.options_tab_view.tab("Main Mixer")
-        stems = ["vocals", "drums", "bass", "other"]
-        for i, stem in enumerate(stems):
+        # --- Progress Bar and Log ---
+        self.progress_frame = ctk.CTkFrame(self)
+        self.progress_frame.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
+        self.progress_frame.grid_columnconfigure(0, weight=1)
+        self.progress_label = ctk.CTkLabel(self.progress_frame, text="Ready to process.")
+        self.progress_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+        self.progress_bar.set(0)
+        self.progress_bar.grid(row=1, column=0, padx=10, pady=(5, 10), sticky="ew")
+
+        self.log_textbox = ctk.CTkTextbox(self)
+        self.log_textbox.grid(row=3, column=0, padx=20, pady=10, sticky="nsew")
+
+        # --- Action Buttons ---
+        self.button_frame = ctk.CTkFrame(self)
+        self.button_frame.grid(row=4, column=0, padx=20, pady=10, sticky="ew")
+        self.button_frame.grid_columnconfigure((0, 1), weight=1)
+        
+        self.start_button = ctk.CTkButton(self.button_frame, text="Start Processing", command=self.start_processing)
+        self.start_button.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+        
+        self.cancel_button = ctk.CTkButton(self.button_frame, text="Cancel", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
+
+        self.interactive_widgets = tuple(self._iw)
+        
+    # ----------------- OPTION TABS -----------------
+    def _on_tab_change(self):
+        self._build_tab(self.options_tab_view.get())
+
+    def _build_tab(self, name):
+        """Builds a tab's widgets the first time it is shown and loads its settings."""
+        if name in self._tabs_built:
+            return
+        self._tabs_built.add(name)
+        build, load, _ = self._tab_handlers[name]
+        build(self.options_tab_view.tab(name))
+        self.interactive_widgets = tuple(self._iw)
+        load()
+
+    def _build_mixer_tab(self, mixer_tab):
+        self._sliders = {}
+        self._mixer_labels = {}
+        for i, stem in enumerate(STEMS):
             ctk.CTkLabel(mixer_tab, text=stem.capitalize()).grid(row=i, column=0, padx=10, pady=5, sticky="w")
-            slider = ctk.CTkSlider(mixer_tab, from_=0, to=2, number_of_steps=200, command=lambda v, s=stem: self._update_mixer_label(s, v))
+            slider = self._mk(ctk.CTkSlider, mixer_tab, from_=0, to=2, number_of_steps=100, command=partial(self._update_mixer_label, stem))
             slider.grid(row=i, column=1, padx=10, pady=5, sticky="ew")
-            setattr(self, f"{stem}_slider", slider)
+            self._sliders[stem] = slider
             lbl = ctk.CTkLabel(mixer_tab, text="100%", width=40)
             lbl.grid(row=i, column=2, padx=10, pady=5)
-            setattr(self, f"{stem}_mixer_label", lbl)
-            self.interactive_widgets.append(slider)
+            self._mixer_labels[stem] = lbl
 
-        # ---- Audio Effects Tab ----
-        effects_tab = self.options_tab_view.tab("Audio Effects")
+    def _build_effects_tab(self, effects_tab):
         ctk.CTkLabel(effects_tab, text="Pitch Shift (semitones)").grid(row=0, column=0, padx=10, pady=5, sticky="w")
-        self.pitch_slider = ctk.CTkSlider(effects_tab, from_=-12, to=12, number_of_steps=24, command=self._update_pitch_label)
+        self.pitch_slider = self._mk(ctk.CTkSlider, effects_tab, from_=-12, to=12, number_of_steps=24, command=self._update_pitch_label)
         self.pitch_slider.grid(row=0, column=1, padx=10, pady=5, sticky="ew")
         self.pitch_slider_label = ctk.CTkLabel(effects_tab, text="0 st", width=40)
         self.pitch_slider_label.grid(row=0, column=2, padx=10, pady=5)
-        self.interactive_widgets.append(self.pitch_slider)
 
         ctk.CTkLabel(effects_tab, text="Speed Multiplier").grid(row=1, column=0, padx=10, pady=5, sticky="w")
-        self.speed_slider = ctk.CTkSlider(effects_tab, from_=0.5, to=2.0, number_of_steps=150, command=self._update_speed_label)
+        self.speed_slider = self._mk(ctk.CTkSlider, effects_tab, from_=0.5, to=2.0, number_of_steps=75, command=self._update_speed_label)
         self.speed_slider.grid(row=1, column=1, padx=10, pady=5, sticky="ew")
         self.speed_slider_label = ctk.CTkLabel(effects_tab, text="1.00x", width=40)
         self.speed_slider_label.grid(row=1, column=2, padx=10, pady=5)
-        self.interactive_widgets.append(self.speed_slider)
         
-        self.normalize_var = tk.BooleanVar()
-        self.normalize_checkbox = ctk.CTkCheckBox(effects_tab, text="Normalize Volume (Loudness)", variable=self.normalize_var)
+        self.normalize_var = CachedBoolVar()
+        self.normalize_checkbox = self._mk(ctk.CTkCheckBox, effects_tab, text="Normalize Volume (Loudness)", variable=self.normalize_var)
         self.normalize_checkbox.grid(row=2, column=0, columnspan=3, padx=10, pady=10, sticky="w")
-        self.interactive_widgets.append(self.normalize_checkbox)
 
-        # ---- Karaoke Tab ----
-        karaoke_tab = self.options_tab_view.tab("Karaoke")
-        self.lyrics_var = tk.BooleanVar()
-        self.lyrics_checkbox = ctk.CTkCheckBox(karaoke_tab, text="Generate & Burn Karaoke Lyrics", variable=self.lyrics_var)
+    def _build_karaoke_tab(self, karaoke_tab):
+        self.lyrics_var = CachedBoolVar()
+        self.lyrics_checkbox = self._mk(ctk.CTkCheckBox, karaoke_tab, text="Generate Karaoke Lyrics", variable=self.lyrics_var)
         self.lyrics_checkbox.grid(row=0, column=0, columnspan=3, padx=10, pady=(10, 5), sticky="w")
-        self.interactive_widgets.append(self.lyrics_checkbox)
         
         ctk.CTkLabel(karaoke_tab, text="AI Model:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
         self.whisper_model_var = tk.StringVar()
-        self.whisper_model_menu = ctk.CTkOptionMenu(karaoke_tab, variable=self.whisper_model_var,
-                                                    values=["tiny", "base", "small", "medium", "large-v3"])
+        self.whisper_model_menu = self._mk(ctk.CTkOptionMenu, karaoke_tab, variable=self.whisper_model_var,
+                                           values=["tiny", "base", "small", "medium", "large-v3"])
         self.whisper_model_menu.grid(row=1, column=1, columnspan=2, padx=10, pady=5, sticky="ew")
-        self.interactive_widgets.append(self.whisper_model_menu)
 
         ctk.CTkLabel(karaoke_tab, text="Font:").grid(row=2, column=0, padx=10, pady=5, sticky="w")
-        self.font_entry = ctk.CTkEntry(karaoke_tab, placeholder_text="Arial")
+        self.font_entry = self._mk(ctk.CTkEntry, karaoke_tab, placeholder_text="Arial")
         self.font_entry.grid(row=2, column=1, columnspan=2, padx=10, pady=5, sticky="ew")
-        self.interactive_widgets.append(self.font_entry)
 
         ctk.CTkLabel(karaoke_tab, text="Font Size:").grid(row=3, column=0, padx=10, pady=5, sticky="w")
-        self.font_size_slider = ctk.CTkSlider(karaoke_tab, from_=12, to=72, number_of_steps=60, command=self._update_font_size_label)
+        self.font_size_slider = self._mk(ctk.CTkSlider, karaoke_tab, from_=12, to=72, number_of_steps=60, command=self._update_font_size_label)
         self.font_size_slider.grid(row=3, column=1, padx=10, pady=5, sticky="ew")
         self.font_size_label = ctk.CTkLabel(karaoke_tab, text="30pt", width=40)
         self.font_size_label.grid(row=3, column=2, padx=10, pady=5)
-        self.interactive_widgets.append(self.font_size_slider)
 
-        karaoke_colors = {"upcoming_color": "Upcoming", "highlight_color": "Highlight", "outline_color": "Outline", "shadow_color": "Shadow"}
-        for i, (key, text) in enumerate(karaoke_colors.items()):
+        # Color previews are plain Tk labels showing a blank image over their background
+        # color, which is far cheaper to recolor than a CTk widget's canvas.
+        self._swatch = tk.PhotoImage(width=80, height=20)
+        self._color_previews = {}
+        for i, (key, text) in enumerate(KARAOKE_COLOR_KEYS):
             ctk.CTkLabel(karaoke_tab, text=f"{text} Color:").grid(row=4+i, column=0, padx=10, pady=5, sticky="w")
-            preview = ctk.CTkLabel(karaoke_tab, text="", fg_color="black", width=80, height=20)
+            preview = tk.Label(karaoke_tab, image=self._swatch, bg="black", width=80, height=20, borderwidth=0)
             preview.grid(row=4+i, column=1, padx=10, pady=5, sticky="w")
-            button = ctk.CTkButton(karaoke_tab, text="Pick...", command=lambda k=key, p=preview: self._pick_color(k, p))
+            button = self._mk(ctk.CTkButton, karaoke_tab, text="Pick...", command=partial(self._pick_color, key, preview))
             button.grid(row=4+i, column=2, padx=10, pady=5)
-            setattr(self, f"{key}_preview", preview)
-            self.interactive_widgets.append(button)
+            self._color_previews[key] = preview
+
+        # Burned-in lyrics keep the word-by-word highlight; a subtitle track avoids re-encoding the video
+        self.burn_subtitles_var = CachedBoolVar()
+        self.burn_subtitles_checkbox = self._mk(ctk.CTkCheckBox, karaoke_tab, text="Burn Lyrics Into Video", variable=self.burn_subtitles_var)
+        self.burn_subtitles_checkbox.grid(row=4+len(KARAOKE_COLOR_KEYS), column=0, columnspan=3, padx=10, pady=(10, 5), sticky="w")
 
-        # ---- Exports Tab ----
-        exports_tab = self.options_tab_view.tab("Exports")
+    def _build_exports_tab(self, exports_tab):
         self.export_mode_var = tk.StringVar()
-        self.export_mode_chooser = ctk.CTkSegmentedButton(exports_tab, variable=self.export_mode_var,
-                                                         values=["Video", "Audio Only", "Stems Only"],
-                                                         command=self._on_export_mode_change)
+        self.export_mode_chooser = self._mk(ctk.CTkSegmentedButton, exports_tab, variable=self.export_mode_var,
+                                            values=["Video", "Audio Only", "Stems Only"],
+                                            command=self._on_export_mode_change)
         self.export_mode_chooser.grid(row=0, column=0, columnspan=3, padx=10, pady=10, sticky="ew")
-        self.interactive_widgets.append(self.export_mode_chooser)
 
         ctk.CTkLabel(exports_tab, text="Audio Format:").grid(row=1, column=0, padx=10, pady=5, sticky="w")
         self.format_var = tk.StringVar()
-        self.format_menu = ctk.CTkOptionMenu(exports_tab, variable=self.format_var, values=["mp3", "wav", "flac"])
+        self.format_menu = self._mk(ctk.CTkOptionMenu, exports_tab, variable=self.format_var, values=["mp3", "wav", "flac"])
         self.format_menu.grid(row=1, column=1, padx=10, pady=5, sticky="w")
-        self.interactive_widgets.append(self.format_menu)
 
         ctk.CTkLabel(exports_tab, text="Stems to Export:").grid(row=2, column=0, padx=10, pady=10, sticky="w")
-        self.stem_vars = {stem: tk.BooleanVar() for stem in ["vocals", "drums", "bass", "other"]}
+        self.stem_vars = {stem: CachedBoolVar() for stem in STEMS}
         self.stem_checkboxes = {}
         for i, stem in enumerate(self.stem_vars.keys()):
-            cb = ctk.CTkCheckBox(exports_tab, text=stem.capitalize(), variable=self.stem_vars[stem])
+            cb = self._mk(ctk.CTkCheckBox, exports_tab, text=stem.capitalize(), variable=self.stem_vars[stem])
             cb.grid(row=3+i, column=0, padx=20, pady=(0,5), sticky="w")
             self.stem_checkboxes[stem] = cb
-            self.interactive_widgets.append(cb)
+        # Their state depends on the export mode, so toggle_ui_state leaves them to _on_export_mode_change
+        self._export_option_ids = frozenset(map(id, (self.format_menu, *self.stem_checkboxes.values())))
 
-        # --- Progress Bar and Log ---
-        self.progress_frame = ctk.CTkFrame(self)
-        self.progress_frame.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
-        self.progress_frame.grid_columnconfigure(0, weight=1)
-        self.progress_label = ctk.CTkLabel(self.progress_frame, text="Ready to process.")
-        self.progress_label.grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
-        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
-        self.progress_bar.set(0)
-        self.progress_bar.grid(row=1, column=0, padx=10, pady=(5, 10), sticky="ew")
-
-        self.log_textbox = ctk.CTkTextbox(self)
-        self.log_textbox.grid(row=3, column=0, padx=20, pady=10, sticky="nsew")
-
-        # --- Action Buttons ---
-        self.button_frame = ctk.CTkFrame(self)
-        self.button_frame.grid(row=4, column=0, padx=20, pady=10, sticky="ew")
-        self.button_frame.grid_columnconfigure((0, 1), weight=1)
-        
-        self.start_button = ctk.CTkButton(self.button_frame, text="Start Processing", command=self.start_processing)
-        self.start_button.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
-        
-        self.cancel_button = ctk.CTkButton(self.button_frame, text="Cancel", command=self.cancel_processing, state=tk.DISABLED)
-        self.cancel_button.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
-        
     # ----------------- PROCESSING LOGIC -----------------
+    def validate_input(self, source):
+        """Returns True if the source is a URL or an existing local file."""
+        return bool(_URL_RE.match(source)) or os.path.exists(source)
+
     def start_processing(self):
         source_path = self.entry_source.get()
         output_dir = self.entry_output_path.get()
@@ -307,18 +466,37 @@ class App(ctk.CTk):
         if not source_path or not output_dir:
             messagebox.showerror("Input Error", "Please provide a source URL/file and an output folder.")
             return
+        if not self.validate_input(source_path):
+            messagebox.showerror("Input Error", "The source must be a URL or an existing local file.")
+            return
         if not os.path.isdir(output_dir):
             messagebox.showerror("Input Error", "The specified output folder does not exist.")
             return
 
+        self._set_widget_state(self.start_button, tk.DISABLED)
+        if not self._backend_ready.is_set():
+            self.progress_label.configure(text="Loading backend...")
+        self._start_when_backend_ready()
+
+    def _start_when_backend_ready(self):
+        if not self._backend_ready.is_set():
+            # The backend is still being imported; check again shortly
+            self.after(100, self._start_when_backend_ready)
+            return
+        if self._backend is None:
+            self.progress_label.configure(text="Ready to process.")
+            self._set_widget_state(self.start_button, tk.NORMAL)
+            messagebox.showerror("Backend Error", f"Failed to load the processing backend:\n{self._backend_error}")
+            return
+
         self.save_ui_to_settings() # Save settings before starting
         self.log_textbox.delete("1.0", tk.END)
         self.update_log("Starting processing...\n")
         self.cancel_flag.clear()
         self.toggle_ui_state(is_processing=True)
         
-        self.processing_thread = threading.Thread(target=self._processing_thread, daemon=True)
-        self.processing_thread.start()
+        self._future = self._executor.submit(self._processing_thread)
+        self._future.add_done_callback(self._on_future_done)
 
     def cancel_processing(self):
         self.update_log("Cancellation signal sent. Please wait for the current step to finish...\n")
@@ -329,7 +507,7 @@ class App(ctk.CTk):
         try:
             # All settings are now read from the self.settings dict
             s = self.settings
-            processing_logic.process_media(
+            self._backend.process_media(
                 source_path=s["source_path"],
                 output_dir_base=s["output_path"],
                 stem_volumes=s["stem_volumes"],
@@ -337,6 +515,7 @@ class App(ctk.CTk):
                 normalize_volume=s["normalize_volume"],
                 speed_multiplier=s["speed_multiplier"],
                 generate_lyrics=s["generate_lyrics"],
+                burn_subtitles=s["burn_subtitles"],
                 whisper_model=s["whisper_model"],
                 karaoke_styles=s["karaoke_styles"],
                 cancel_flag=self.cancel_flag,
@@ -345,55 +524,132 @@ class App(ctk.CTk):
                 export_format=s["export_format"],
                 stems_to_export=[stem for stem, selected in s["stems_to_export"].items() if selected]
             )
-        except processing_logic.CancelledError:
-            self.update_log("Processing was successfully cancelled by the user.\n")
-        except processing_logic.ProcessingError as e:
-            self.update_log(f"\n❌ PROCESSING ERROR:\n{e}\n\nDetails:\n{e.details}\n")
+        except self._backend.CancelledError:
+            self._post("log", "Processing was successfully cancelled by the user.\n")
+        except self._backend.ProcessingError as e:
+            self._post("log", f"\n❌ PROCESSING ERROR:\n{e}\n\nDetails:\n{e.details}\n")
         except Exception as e:
-            self.update_log(f"\n❌ An unexpected error occurred: {type(e).__name__}: {e}\n")
-        finally:
-            self.toggle_ui_state(is_processing=False)
-            self.update_progress("Ready to process.", 0)
+            self._post("log", f"\n❌ An unexpected error occurred: {type(e).__name__}: {e}\n")
+
+    def _on_future_done(self, future):
+        # Runs on the worker thread once the job has finished, however it ended
+        self._post("done")
+
+    def _on_processing_done(self):
+        self.toggle_ui_state(is_processing=False)
+        self._queue_progress("Ready to process.", 0)
+
+    def _post(self, kind, *args):
+        """Queues a UI update from any thread; it is applied by _drain_queue on the main thread."""
+        self._ui_queue.put((kind, args))
+
+    def _drain_queue(self):
+        while True:
+            try:
+                kind, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._ui_handlers[kind](*args)
+        # Progress updates are coalesced so the UI is redrawn at most once per poll
+        if self._pending_progress is not None:
+            message, percentage = self._pending_progress
+            self._pending_progress = None
+            self._update_progress_ui(message, percentage)
+        # All log lines from this poll are written with a single insert
+        self._flush_log()
+        self.after(50, self._drain_queue)
 
     def update_progress(self, message, percentage):
         """
         Updates the progress bar and label.
         If percentage is negative, enters indeterminate mode for long-running tasks.
         """
-        # This function is called from a different thread, so we use after()
-        # to ensure UI updates happen on the main thread.
-        self.after(0, self._update_progress_ui, message, percentage)
+        # This function is called from a different thread, so the update is
+        # posted to the UI queue instead of touching widgets directly.
+        key = (message, int(percentage))
+        if key == self._last_posted_progress:
+            return
+        # Repeated ticks of one message (e.g. "Downloading: 42.1%") are capped at
+        # ~30 Hz; any other message is always posted so no step is lost from the log.
+        template = _DIGITS_RE.sub("#", message)
+        now = time.monotonic()
+        if template == self._last_progress_template and now - self._last_progress_time < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_posted_progress = key
+        self._last_progress_template = template
+        self._last_progress_time = now
+        self._post("progress", message, percentage)
+
+    def _queue_progress(self, message, percentage):
+        key = (message, int(percentage))
+        if key != self._last_progress_key: # Skip duplicate lines from rapid repeated updates
+            self._last_progress_key = key
+            self.update_log(f"[{'BUSY' if percentage < 0 else str(int(percentage))+'%'}] {message}\n")
+        self._pending_progress = (message, percentage)
 
     def _update_progress_ui(self, message, percentage):
-        self.update_log(f"[{'BUSY' if percentage < 0 else str(int(percentage))+'%'}] {message}\n")
         self.progress_label.configure(text=message)
 
+        # The current mode is tracked in self._progress_mode to avoid a cget() per update
         if percentage < 0:
             # Enter indeterminate mode
-            if self.progress_bar.cget("mode") == "determinate":
+            if self._progress_mode == "determinate":
                 self.progress_bar.configure(mode='indeterminate')
                 self.progress_bar.start()
+                self._progress_mode = "indeterminate"
         else:
             # Enter determinate mode
-            if self.progress_bar.cget("mode") == "indeterminate":
+            if self._progress_mode == "indeterminate":
                 self.progress_bar.stop()
                 self.progress_bar.configure(mode='determinate')
+                self._progress_mode = "determinate"
             self.progress_bar.set(percentage / 100.0)
 
     def update_log(self, message):
-        self.log_textbox.insert(tk.END, message)
+        """Queues a log message. Queued messages are written to the log in one batch per poll."""
+        self._log_queue.append(message)
+
+    def _flush_log(self):
+        parts = []
+        while self._log_queue:
+            parts.append(self._log_queue.popleft())
+        if not parts:
+            return
+        self.log_textbox.insert(tk.END, "".join(parts))
+        # Keep only the most recent lines so the widget never grows unbounded
+        self.log_textbox.delete("1.0", f"end-{MAX_LOG_LINES}l")
+        if not self._scroll_pending:
+            self._scroll_pending = True
+            self.after_idle(self._scroll_log_to_end)
+
+    def _scroll_log_to_end(self):
         self.log_textbox.see(tk.END)
+        self._scroll_pending = False
+
+    def _set_widget_state(self, widget, state):
+        """Configures a widget's state, skipping the redraw if it is already in that state."""
+        if self._widget_state.get(id(widget)) == state:
+            return
+        widget.configure(state=state)
+        self._widget_state[id(widget)] = state
 
     def toggle_ui_state(self, is_processing):
         state = tk.DISABLED if is_processing else tk.NORMAL
+        skip = frozenset() if is_processing else self._export_option_ids
         for widget in self.interactive_widgets:
-             widget.configure(state=state)
+            if id(widget) not in skip:
+                self._set_widget_state(widget, state)
+        if not is_processing and "Exports" in self._tabs_built:
+            # The export options were skipped above; set them straight to the mode's states
+            self._last_export_mode = None
+            self._on_export_mode_change(self.export_mode_var.get())
 
         # THE BUGGY LOOP WAS HERE AND HAS BEEN REMOVED.
         # The widgets inside the tabs are already in self.interactive_widgets,
         # so they are disabled correctly by the loop above.
 
-        self.start_button.configure(state=state)
+        # start_processing has usually disabled the start button already
+        self._set_widget_state(self.start_button, state)
         self.cancel_button.configure(state=tk.NORMAL if is_processing else tk.DISABLED, text="Cancel")
 
     # ----------------- SETTINGS HANDLING -----------------
@@ -401,45 +657,73 @@ class App(ctk.CTk):
         s = self.settings
         s["source_path"] = self.entry_source.get()
         s["output_path"] = self.entry_output_path.get()
-        s["stem_volumes"] = {stem: getattr(self, f"{stem}_slider").get() for stem in ["vocals", "drums", "bass", "other"]}
+        # Tabs that were never opened still hold their loaded values in self.settings
+        for name in self._tabs_built:
+            self._tab_handlers[name][2]()
+        s["appearance_mode"] = ctk.get_appearance_mode()
+        s["window_geometry"] = self.geometry()
+
+    def _save_mixer_settings(self):
+        self.settings["stem_volumes"] = {stem: self._sliders[stem].get() for stem in STEMS}
+
+    def _save_effects_settings(self):
+        s = self.settings
         s["pitch_shift"] = self.pitch_slider.get()
-        s["speed_multiplier"] = self.speed_slider.get()
-        s["normalize_volume"] = self.normalize_var.get()
-        s["generate_lyrics"] = self.lyrics_var.get()
+        speed = self.speed_slider.get()
+        # Slider rounding can land a hair off 1.0, which would still force a re-encode
+        s["speed_multiplier"] = 1.0 if abs(speed - 1.0) < 0.005 else speed
+        s["normalize_volume"] = self.normalize_var.cached
+
+    def _save_karaoke_settings(self):
+        s = self.settings
+        s["generate_lyrics"] = self.lyrics_var.cached
+        s["burn_subtitles"] = self.burn_subtitles_var.cached
         s["whisper_model"] = self.whisper_model_var.get()
         s["karaoke_styles"]["font_name"] = self.font_entry.get()
         s["karaoke_styles"]["font_size"] = int(self.font_size_slider.get())
+
+    def _save_exports_settings(self):
+        s = self.settings
         s["export_mode"] = self.export_mode_var.get()
         s["export_format"] = self.format_var.get()
-        s["stems_to_export"] = {stem: var.get() for stem, var in self.stem_vars.items()}
-        s["appearance_mode"] = ctk.get_appearance_mode()
-        s["window_geometry"] = self.geometry()
+        s["stems_to_export"] = {stem: var.cached for stem, var in self.stem_vars.items()}
 
     def load_ui_from_settings(self):
         s = self.settings
         self.entry_source.insert(0, s["source_path"])
         self.entry_output_path.insert(0, s["output_path"])
-        for stem, vol in s["stem_volumes"].items():
-            getattr(self, f"{stem}_slider").set(vol)
+        # Only the visible tab is built now; the rest load their settings when first shown
+        self._build_tab(self.options_tab_view.get())
+
+    def _load_mixer_settings(self):
+        for stem, vol in self.settings["stem_volumes"].items():
+            self._sliders[stem].set(vol)
             self._update_mixer_label(stem, vol)
+
+    def _load_effects_settings(self):
+        s = self.settings
         self.pitch_slider.set(s["pitch_shift"])
         self._update_pitch_label(s["pitch_shift"])
         self.speed_slider.set(s["speed_multiplier"])
         self._update_speed_label(s["speed_multiplier"])
         self.normalize_var.set(s["normalize_volume"])
+
+    def _load_karaoke_settings(self):
+        s = self.settings
         self.lyrics_var.set(s["generate_lyrics"])
-        self.whisper_model_var.set(s.get("whisper_model", "large-v3"))
+        self.burn_subtitles_var.set(s["burn_subtitles"])
+        self.whisper_model_var.set(s["whisper_model"])
         
         ks = s["karaoke_styles"]
         self.font_entry.insert(0, ks["font_name"])
         self.font_size_slider.set(ks["font_size"])
         self._update_font_size_label(ks["font_size"])
         
-        self.upcoming_color_preview.configure(fg_color=ks["upcoming_color"])
-        self.highlight_color_preview.configure(fg_color=ks["highlight_color"])
-        self.outline_color_preview.configure(fg_color=ks.get("outline_color", "#000000"))
-        self.shadow_color_preview.configure(fg_color=ks.get("shadow_color", "#000000"))
+        for key, preview in self._color_previews.items():
+            self._set_swatch_color(preview, ks[key])
 
+    def _load_exports_settings(self):
+        s = self.settings
         self.export_mode_var.set(s["export_mode"])
         self.format_var.set(s["export_format"])
         for stem, selected in s["stems_to_export"].items():
@@ -448,17 +732,17 @@ class App(ctk.CTk):
         self._on_export_mode_change(s["export_mode"])
 
     def on_closing(self):
-        if self.processing_thread and self.processing_thread.is_alive():
-            if messagebox.askyesno("Confirm Exit", "Processing is still in progress. Are you sure you want to exit?"):
+        if self._future is not None and not self._future.done():
+            if messagebox.askyesno("Confirm Exit", "Processing is still in progress. Are you sure you want to exit?\n\n"
+                                   "The run will stop at its next checkpoint (usually within a few seconds) before the app fully closes."):
+                # Cancel first so the worker thread, which keeps the process alive, exits promptly
                 self.cancel_flag.set()
+                self._executor.shutdown(wait=False, cancel_futures=True)
                 self.destroy()
         else:
             self.save_ui_to_settings()
-            try:
-                with open(CONFIG_FILE, "w") as f:
-                    json.dump(self.settings, f, indent=4)
-            except IOError as e:
-                print(f"Failed to save settings: {e}")
+            self.save_settings()
+            self._executor.shutdown(wait=False)
             self.destroy()
 
 if __name__ == "__main__":
@@ -3,17 +3,54 @@ import os
 import sys
 import subprocess
 import shutil
-import math
 import re
+import time
+import threading
+from functools import lru_cache
 import yt_dlp
 import ffmpeg
+import numpy as np
 import torch
+import torchaudio
+from demucs.apply import apply_model
+from demucs.audio import convert_audio, save_audio
+from demucs.pretrained import get_model
 from pathlib import Path
 import stable_whisper
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_EXCEPTION
+
+try:
+    import faster_whisper # noqa: F401 - enables stable-ts' CTranslate2 backend
+    HAS_FASTER_WHISPER = True
+except ImportError:
+    HAS_FASTER_WHISPER = False
 
 # --- Configuration ---
-CHUNK_DURATION_SECONDS = 300
 LYRIC_PRE_DISPLAY_OFFSET_SECONDS = 0.5
+DEMUCS_MODEL_NAME = "htdemucs"
+DEMUCS_OVERLAP = 0.1 # Fraction shared by neighbouring segments; htdemucs' segment length itself is fixed
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+# Lets fp32 matmuls use TF32 tensor cores on GPUs that have them
+torch.set_float32_matmul_precision('high')
+
+# Approximate VRAM (GB) needed to run each model; used to decide whether Whisper can share the GPU with Demucs
+WHISPER_VRAM_GB = {"tiny": 1, "base": 1, "small": 2, "medium": 5, "large-v3": 10}
+FASTER_WHISPER_VRAM_GB = {"tiny": 0.5, "base": 0.5, "small": 1, "medium": 2, "large-v3": 3.5} # int8 weights
+DEMUCS_VRAM_GB = 3
+
+# H.264 encoders in order of preference, with the options that give each one comparable quality
+VIDEO_ENCODERS = (
+    ('h264_nvenc', {'preset': 'p5', 'rc': 'vbr', 'cq': 23}),
+    ('h264_qsv', {'global_quality': 23}),
+    ('h264_amf', {'quality': 'balanced'}),
+    ('h264_videotoolbox', {'b:v': '6M'}),
+    ('libx264', {}),
+)
+
+_DEMUCS_MODEL = None # Loaded on first use and kept for later runs
+_HEX_RE = re.compile(r'^#[0-9a-fA-F]{6}$')
+_INVALID_FILENAME_RE = re.compile(r'[\\/*?:"<>|]')
 
 class CancelledError(Exception):
     pass
@@ -25,7 +62,7 @@ class ProcessingError(Exception):
 
 def sanitize_filename(name):
     """Removes characters that are invalid for file names."""
-    return re.sub(r'[\\/*?:"<>|]', "", name)
+    return _INVALID_FILENAME_RE.sub("", name)
 
 def check_cancel(cancel_flag):
     """Checks if the user has requested to cancel processing."""
@@ -34,10 +71,42 @@ def check_cancel(cancel_flag):
 
 def hex_to_ass_color(hex_color):
     """Converts a web hex color (#RRGGBB) to an ASS format color (&HBBGGRR&)."""
-    if not isinstance(hex_color, str) or not re.match(r'^#[0-9a-fA-F]{6}$', hex_color):
+    if not isinstance(hex_color, str):
         return "&H00FFFFFF&"  # Default to white on error
+    return _hex_to_ass_color(hex_color)
+
+@lru_cache(maxsize=64)
+def _hex_to_ass_color(hex_color):
+    if not _HEX_RE.match(hex_color):
+        return "&H00FFFFFF&"
     return f"&H{hex_color[5:7]}{hex_color[3:5]}{hex_color[1:3]}&".upper()
 
+def _timestamps(seconds):
+    """Formats an array of seconds as ASS timestamps (H:MM:SS.cc)."""
+    h, rem = np.divmod(seconds, 3600)
+    m, sec = np.divmod(rem, 60)
+    cs = (sec % 1 * 100).astype(np.int64)
+    return [f"{hh}:{mm:02}:{ss:02}.{cc:02}" for hh, mm, ss, cc in
+            zip(h.astype(np.int64).tolist(), m.astype(np.int64).tolist(), sec.astype(np.int64).tolist(), cs.tolist())]
+
+@lru_cache(maxsize=8)
+def _ass_header(font_name, font_size, highlight_color, upcoming_color, outline_color, shadow_color):
+    """Returns the ASS header, style block and events format line for the given style."""
+    # --- The single, correctly configured style for karaoke ---
+    # PrimaryColour is the color AFTER highlighting (the "fill" color).
+    # SecondaryColour is the color BEFORE highlighting (the "upcoming" color).
+    # The \k tag transitions from Secondary to Primary color over its duration.
+    return ("[Script Info]\nTitle: Karaoke Lyrics\nScriptType: v4.00+\nPlayResX: 1280\nPlayResY: 720\n\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+            "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+            f"Style: Karaoke,{font_name},{font_size},{highlight_color},{upcoming_color},{outline_color},{shadow_color},"
+            "-1,0,0,0,100,100,0,0,1,2,2,2,10,10,20,1\n\n"
+            # --- Events (The actual lyrics) ---
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+
 def _generate_karaoke_subtitles(transcription_result, output_path, styles):
     """
     (REWRITTEN) Generates a correctly formatted Advanced SubStation Alpha (.ass)
@@ -50,40 +119,171 @@ def _generate_karaoke_subtitles(transcription_result, output_path, styles):
     font_name = styles.get("font_name", "Arial")
     font_size = styles.get("font_size", 30)
 
-    with open(output_path, "w", encoding="utf-8-sig") as f:
-        # --- ASS Header ---
-        f.write("[Script Info]\nTitle: Karaoke Lyrics\nScriptType: v4.00+\nPlayResX: 1280\nPlayResY: 720\n\n")
-        f.write("[V4+ Styles]\n")
-        f.write("Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
-                "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
-                "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n")
-        # --- The single, correctly configured style for karaoke ---
-        # PrimaryColour is the color AFTER highlighting (the "fill" color).
-        # SecondaryColour is the color BEFORE highlighting (the "upcoming" color).
-        # The \k tag transitions from Secondary to Primary color over its duration.
-        f.write(f"Style: Karaoke,{font_name},{font_size},{highlight_color},{upcoming_color},{outline_color},{shadow_color},"
-                "-1,0,0,0,100,100,0,0,1,2,2,2,10,10,20,1\n\n")
-        
-        # --- Events (The actual lyrics) ---
-        f.write("[Events]\n")
-        f.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
-        
-        for segment in transcription_result.segments:
-            # Line-level timing
-            start_s = max(0, segment.start - LYRIC_PRE_DISPLAY_OFFSET_SECONDS)
-            start_time = f"{int(start_s//3600)}:{int(start_s%3600//60):02}:{int(start_s%60):02}.{int(start_s%1*100):02}"
-            end_time = f"{int(segment.end//3600)}:{int(segment.end%3600//60):02}:{int(segment.end%60):02}.{int(segment.end%1*100):02}"
-            
-            # Word-level timing for karaoke effect
-            line_parts = []
-            for word in segment.words:
-                duration_cs = int((word.end - word.start) * 100)  # Karaoke duration in centiseconds
-                # The \k tag creates the progressive fill effect
-                line_parts.append(f"{{\\k{duration_cs}}}{word.word.strip()}")
-            line_text = " ".join(line_parts)
-            
-            # Write the dialogue line using the "Karaoke" style
-            f.write(f"Dialogue: 0,{start_time},{end_time},Karaoke,,0,0,0,,{line_text}\n")
+    parts = [_ass_header(font_name, font_size, highlight_color, upcoming_color, outline_color, shadow_color)]
+
+    # All timings are pulled into arrays once so the arithmetic runs vectorised
+    segments = transcription_result.segments
+    words = [word for segment in segments for word in segment.words]
+    seg_starts = np.fromiter((segment.start for segment in segments), np.float64, len(segments))
+    seg_ends = np.fromiter((segment.end for segment in segments), np.float64, len(segments))
+    word_starts = np.fromiter((word.start for word in words), np.float64, len(words))
+    word_ends = np.fromiter((word.end for word in words), np.float64, len(words))
+
+    # Line-level timing
+    start_times = _timestamps(np.maximum(seg_starts - LYRIC_PRE_DISPLAY_OFFSET_SECONDS, 0))
+    end_times = _timestamps(seg_ends)
+    # Word-level timing: each \k tag (duration in centiseconds) creates the progressive fill effect
+    durations_cs = ((word_ends - word_starts) * 100).astype(np.int64).tolist()
+    tags = [f"{{\\k{cs}}}{word.word.strip()}" for cs, word in zip(durations_cs, words)]
+
+    pos = 0
+    for segment, start_time, end_time in zip(segments, start_times, end_times):
+        n = len(segment.words)
+        line_text = " ".join(tags[pos:pos + n])
+        pos += n
+        # Write the dialogue line using the "Karaoke" style
+        parts.append(f"Dialogue: 0,{start_time},{end_time},Karaoke,,0,0,0,,{line_text}\n")
+
+    Path(output_path).write_text("".join(parts), encoding="utf-8-sig")
+
+def _is_master_wav(path):
+    """True if `path` is already a 44.1 kHz stereo 16-bit PCM WAV, the format used as the processing master."""
+    if not path.lower().endswith('.wav'):
+        return False
+    try:
+        streams = ffmpeg.probe(path).get('streams', [])
+    except ffmpeg.Error:
+        return False
+    return (len(streams) == 1 and streams[0].get('codec_name') == 'pcm_s16le'
+            and streams[0].get('sample_rate') == '44100' and streams[0].get('channels') == 2)
+
+def _download_progress_hook(progress_callback, label="Downloading", cancel_flag=None, abort=None,
+                            min_interval=0.25, min_step=5.0):
+    """
+    Returns a yt-dlp progress hook that forwards updates at most every `min_interval` s or `min_step` %.
+    Raising from the hook is how yt-dlp stops a download, so it also aborts on cancel or when `abort` is set.
+    """
+    last_time, last_pct = 0.0, -min_step
+    def hook(d):
+        nonlocal last_time, last_pct
+        if cancel_flag is not None:
+            check_cancel(cancel_flag)
+        if abort is not None and abort.is_set():
+            raise yt_dlp.utils.DownloadCancelled("Stopped because the other download failed.")
+        if d.get('status') == 'error':
+            return # The exception reaches process_media through the download's future
+        if d.get('status') == 'downloading':
+            now = time.monotonic()
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            pct = 100.0 * d.get('downloaded_bytes', 0) / total if total else last_pct
+            if now - last_time < min_interval and pct - last_pct < min_step:
+                return
+            last_time, last_pct = now, pct
+        progress_callback(f"{label}: {d.get('_percent_str', '100%').strip()}", 11)
+    return hook
+
+def _find_downloads(directory, *names):
+    """Returns the path of the first `name.<ext>` file in `directory` for each of `names` (None if missing)."""
+    found = dict.fromkeys(names)
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name.rpartition('.')[0]
+            if name in found and found[name] is None and entry.is_file():
+                found[name] = entry.path
+    return [found[name] for name in names]
+
+def _probe_vcodec(vcodec, vcodec_opts):
+    """Encodes one blank frame with `vcodec`; False if the encoder cannot open (e.g. no such GPU)."""
+    opts = [arg for key, value in vcodec_opts.items() for arg in (f'-{key}', str(value))]
+    try:
+        return subprocess.run(['ffmpeg', '-hide_banner', '-v', 'error', '-f', 'lavfi', '-i', 'nullsrc=s=256x256',
+                               '-frames:v', '1', '-pix_fmt', 'yuv420p', '-c:v', vcodec, *opts, '-f', 'null', '-'],
+                              capture_output=True, timeout=15).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+@lru_cache(maxsize=None)
+def _available_vcodecs():
+    """Returns the VIDEO_ENCODERS entries this ffmpeg build and machine can use, fastest first."""
+    try:
+        listed = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True).stdout
+    except OSError:
+        listed = ""
+    usable = []
+    for vcodec, vcodec_opts in VIDEO_ENCODERS:
+        if vcodec != 'libx264' and vcodec not in listed:
+            continue
+        if vcodec == 'h264_nvenc' and not torch.cuda.is_available():
+            continue
+        if vcodec == 'h264_videotoolbox' and sys.platform != 'darwin':
+            continue
+        # Builds list hardware encoders whether or not the hardware exists, so try one frame
+        if vcodec != 'libx264' and not _probe_vcodec(vcodec, vcodec_opts):
+            continue
+        usable.append((vcodec, vcodec_opts))
+    return tuple(usable)
+
+def _ydl_download(source_path, ydl_opts):
+    """Downloads `source_path` with yt-dlp using `ydl_opts`."""
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl: ydl.download([source_path])
+
+def _whisper_compute_type(device):
+    """Chooses the CTranslate2 compute type for faster-whisper on `device`."""
+    if device != 'cuda':
+        return 'int8'
+    capability = torch.cuda.get_device_capability()
+    # fp16 compute needs tensor cores (7.0+); CTranslate2's int8 kernels run from 6.1 (Pascal)
+    if capability >= (7, 0):
+        return 'int8_float16'
+    return 'int8' if capability >= (6, 1) else 'float32'
+
+# Only the most recent model is kept; large Whisper models take several GB of VRAM
+@lru_cache(maxsize=1)
+def _get_whisper(whisper_model, device):
+    """Loads a Whisper model once per (name, device) and reuses it on later runs."""
+    if HAS_FASTER_WHISPER:
+        # Same stable-ts result object, but inference runs in CTranslate2
+        return stable_whisper.load_faster_whisper(whisper_model, device=device,
+                                                  compute_type=_whisper_compute_type(device))
+    return stable_whisper.load_model(whisper_model, device=device)
+
+def clear_model_cache():
+    """Drops the cached Whisper and Demucs models and returns their memory to the system."""
+    global _DEMUCS_MODEL
+    _get_whisper.cache_clear()
+    _DEMUCS_MODEL = None
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def _can_overlap_whisper(whisper_model, device):
+    """True if Whisper can run while Demucs is separating without running the GPU out of memory."""
+    if device != 'cuda':
+        return True
+    free_bytes, _ = torch.cuda.mem_get_info()
+    table = FASTER_WHISPER_VRAM_GB if HAS_FASTER_WHISPER else WHISPER_VRAM_GB
+    needed_gb = table.get(whisper_model, max(table.values())) + DEMUCS_VRAM_GB
+    return free_bytes / 1024**3 >= needed_gb
+
+def _transcribe(audio_file, whisper_model, device, cancel_flag, stop=None):
+    """
+    Runs Whisper with word timestamps on `audio_file` and returns the stable-ts result.
+    `stop` lets the caller end the run early (e.g. after a failure elsewhere) without touching `cancel_flag`.
+    """
+    check_cancel(cancel_flag)
+    model = _get_whisper(whisper_model, device)
+    check_cancel(cancel_flag)
+    # stable-ts reports progress between segments, which is where a cancel can stop the run
+    def on_progress(seek, total):
+        check_cancel(cancel_flag)
+        if stop is not None:
+            check_cancel(stop)
+    if HAS_FASTER_WHISPER:
+        # The built-in Silero VAD skips instrumental stretches instead of decoding them
+        # load_faster_whisper swaps in the stable-ts wrapper, so this returns a stable-ts result
+        return model.transcribe(audio_file, vad_filter=True, vad_parameters={'min_silence_duration_ms': 500},
+                                progress_callback=on_progress)
+    with torch.inference_mode():
+        return model.transcribe(audio_file, fp16=(device == 'cuda'), progress_callback=on_progress)
 
 def get_audio_codec(format_str):
     """Maps common format names to FFmpeg codec names."""
@@ -94,15 +294,104 @@ def get_audio_codec(format_str):
     }
     return codec_map.get(format_str.lower(), "libmp3lame")
 
+def _get_demucs_model(device):
+    """Returns the cached Demucs model on `device`, loading the weights on first use."""
+    global _DEMUCS_MODEL
+    if _DEMUCS_MODEL is None:
+        _DEMUCS_MODEL = get_model(DEMUCS_MODEL_NAME)
+        _DEMUCS_MODEL.eval()
+    return _DEMUCS_MODEL.to(device)
+
+def _separate_stems(audio_file, stem_dir, device, cancel_flag):
+    """Separates `audio_file` into one wav per source in `stem_dir`, mirroring the demucs CLI."""
+    model = _get_demucs_model(device)
+    # apply_model runs each sub-model once per segment, so a pre-hook gives a cancel point every few seconds of audio
+    hooks = [m.register_forward_pre_hook(lambda module, args: check_cancel(cancel_flag))
+             for m in getattr(model, 'models', [model])]
+    wav, sr = torchaudio.load(audio_file)
+    wav = convert_audio(wav, sr, model.samplerate, model.audio_channels)
+    # Same normalisation as the CLI, undone on the separated sources
+    ref = wav.mean(0)
+    mean, std = ref.mean(), ref.std()
+    wav = (wav - mean) / std
+    # fp16 autocast on CUDA only; STFT-sensitive ops keep full precision, unlike model.half()
+    try:
+        with torch.inference_mode(), torch.autocast(device_type='cuda', dtype=torch.float16, enabled=(device == 'cuda')):
+            sources = apply_model(model, wav[None], device=device, split=True, overlap=DEMUCS_OVERLAP, progress=False)[0]
+    finally:
+        # The model is cached across runs, so the hooks must not outlive this one
+        for hook in hooks:
+            hook.remove()
+    sources = sources.float() * std + mean
+    os.makedirs(stem_dir, exist_ok=True)
+    for source, name in zip(sources, model.sources):
+        save_audio(source.cpu(), os.path.join(stem_dir, f'{name}.wav'), samplerate=model.samplerate)
+
+def _is_unity(volume):
+    """True if a slider volume is 1.0 (allowing for float steps)."""
+    return abs(volume - 1.0) < 1e-6
+
+def _mix_stems(valid_stems, stem_paths, stem_volumes, source_audio):
+    """Returns an ffmpeg stream mixing `valid_stems` with the requested volumes."""
+    if not valid_stems:
+        # Every stem is muted; a silenced copy of the source keeps the track length
+        return ffmpeg.input(source_audio).filter('volume', 0)
+    inputs_with_filter = []
+    for s in valid_stems:
+        stream = ffmpeg.input(stem_paths[s])
+        inputs_with_filter.append(stream if _is_unity(stem_volumes[s]) else stream.filter('volume', stem_volumes[s]))
+    if len(inputs_with_filter) == 1:
+        return inputs_with_filter[0]
+    # normalize=0 sums the stems as-is; Demucs sources add back up to the original mix at 100 %
+    return ffmpeg.filter(inputs_with_filter, 'amix', inputs=len(valid_stems), duration='longest', normalize=0)
+
+def _run_ffmpeg(stream, cancel_flag, output_path, poll_interval=0.5):
+    """
+    Runs an ffmpeg-python stream like .run(capture_stderr=True), but stays responsive to cancel.
+    A background thread drains stderr so a chatty encode can never block on a full pipe.
+    If the encode is stopped early, the partly written `output_path` is removed.
+    """
+    process = stream.run_async(overwrite_output=True, pipe_stderr=True)
+    stderr_chunks = []
+    drainer = threading.Thread(target=lambda: stderr_chunks.extend(iter(lambda: process.stderr.read(65536), b'')),
+                               daemon=True)
+    drainer.start()
+    try:
+        while process.poll() is None:
+            check_cancel(cancel_flag)
+            time.sleep(poll_interval)
+    except BaseException:
+        process.terminate()
+        process.wait()
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        drainer.join()
+    if process.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', None, b''.join(stderr_chunks))
+
+def _export_stem(stem, stem_path, stem_out_file, audio_codec, cancel_flag):
+    """Encodes one separated stem to its export file."""
+    try:
+        _run_ffmpeg(ffmpeg.input(stem_path).output(stem_out_file, acodec=audio_codec).global_args('-threads', '2'),
+                    cancel_flag, stem_out_file)
+    except ffmpeg.Error as e:
+        raise ProcessingError(f"FFmpeg failed while exporting {stem} stem.", e.stderr.decode('utf-8', errors='ignore'))
+
 def process_media(
     source_path, output_dir_base, stem_volumes, pitch_shift, normalize_volume,
     speed_multiplier, generate_lyrics, whisper_model, karaoke_styles,
     cancel_flag, progress_callback, export_mode="Video", export_format="mp3",
-    stems_to_export=None
+    stems_to_export=None, video_encoder=None, burn_subtitles=False
 ):
     temp_processing_dir = None
+    lyrics_executor = None
+    stop_lyrics = threading.Event()
     is_local_file = os.path.exists(source_path)
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = DEVICE
     stems = ["vocals", "drums", "bass", "other"]
     if stems_to_export is None:
         stems_to_export = []
@@ -111,7 +400,7 @@ def process_media(
     
     try:
         # Step 1: Setup
-        check_cancel(cancel_flag); progress_callback("Step 1/8: Setting up...", 0)
+        check_cancel(cancel_flag); progress_callback("Step 1/7: Setting up...", 0)
         progress_callback("Getting media title...", 1)
         video_title = sanitize_filename(Path(source_path).stem) if is_local_file else \
             sanitize_filename(yt_dlp.YoutubeDL({'quiet': True, 'noplaylist': True, 'extract_flat': True})
@@ -121,9 +410,13 @@ def process_media(
         os.makedirs(temp_processing_dir, exist_ok=True)
         
         # Step 2: Acquire media
-        check_cancel(cancel_flag); progress_callback("Step 2/8: Acquiring media...", 10)
+        check_cancel(cancel_flag); progress_callback("Step 2/7: Acquiring media...", 10)
         # ... (rest of media acquisition is unchanged, it is robust) ...
-        if is_local_file:
+        if is_local_file and _is_master_wav(source_path):
+            # Already in the master format, so every later stage can read it in place
+            video_stream_file, full_audio_file = source_path, source_path
+            progress_callback(f"Using local WAV directly: {source_path}", 11)
+        elif is_local_file:
             video_stream_file, full_audio_file = source_path, os.path.join(temp_processing_dir, 'full_audio.wav')
             progress_callback(f"Extracting audio from local file: {source_path}", 11)
             try:
@@ -134,23 +427,45 @@ def process_media(
             except ffmpeg.Error as e:
                 raise ProcessingError("FFmpeg failed during audio extraction.", e.stderr.decode('utf-8', errors='ignore'))
         else:
-            ydl_opts = {'noplaylist': True, 'quiet': True, 'progress_hooks': [lambda d: progress_callback(f"Downloading: {d['_percent_str']}", 11)]}
-            ydl_opts['outtmpl'] = os.path.join(temp_processing_dir, 'video_stream.%(ext)s')
-            ydl_opts['format'] = 'bestvideo[ext=mp4]/best[ext=mp4]'
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl: ydl.download([source_path])
-            video_stream_file = next(Path(temp_processing_dir).glob('video_stream.*'), None)
+            # Both downloads report progress, but the callback must only be entered by one thread at a time
+            progress_lock = threading.Lock()
+            abort_downloads = threading.Event()
+            def report_progress(message, percentage):
+                with progress_lock:
+                    progress_callback(message, percentage)
+
+            video_opts = {'noplaylist': True, 'quiet': True,
+                          'progress_hooks': [_download_progress_hook(report_progress, "Downloading video", cancel_flag, abort_downloads)]}
+            video_opts['outtmpl'] = os.path.join(temp_processing_dir, 'video_stream.%(ext)s')
+            video_opts['format'] = 'bestvideo[ext=mp4]/best[ext=mp4]'
+
+            audio_opts = {'noplaylist': True, 'quiet': True,
+                          'progress_hooks': [_download_progress_hook(report_progress, "Downloading audio", cancel_flag, abort_downloads)]}
+            audio_opts['outtmpl'] = os.path.join(temp_processing_dir, 'full_audio.%(ext)s')
+            audio_opts['format'] = 'bestaudio/best'
+            # yt-dlp converts straight to the 44.1 kHz stereo PCM master while finishing the download
+            audio_opts['postprocessors'] = [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'wav'}]
+            audio_opts['postprocessor_args'] = {'extractaudio': ['-ar', '44100', '-ac', '2']}
+
+            # The video and audio streams are independent downloads, so they run side by side
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                downloads = [ex.submit(_ydl_download, source_path, opts) for opts in (video_opts, audio_opts)]
+                # Fail fast: once either download fails, the other one stops at its next progress tick
+                wait(downloads, return_when=FIRST_EXCEPTION)
+                abort_downloads.set()
+            errors = [future.exception() for future in downloads if future.exception() is not None]
+            if errors:
+                raise next((e for e in errors if not isinstance(e, yt_dlp.utils.DownloadCancelled)), errors[0])
+            video_stream_file, downloaded_audio_file = _find_downloads(temp_processing_dir, 'video_stream', 'full_audio')
             if not video_stream_file: raise ProcessingError("Failed to download video stream.")
+            if not downloaded_audio_file: raise ProcessingError("Failed to download audio stream.")
 
-            ydl_opts['outtmpl'] = os.path.join(temp_processing_dir, 'full_audio.%(ext)s')
-            ydl_opts['format'] = 'bestaudio/best'
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl: ydl.download([source_path])
-            downloaded_audio_file = next(Path(temp_processing_dir).glob('full_audio.*'))
             full_audio_file = os.path.join(temp_processing_dir, 'full_audio.wav')
-            if str(downloaded_audio_file) != full_audio_file:
+            if downloaded_audio_file != full_audio_file:
                 progress_callback("Converting downloaded audio to WAV...", 13)
                 try:
                     (ffmpeg
-                     .input(str(downloaded_audio_file))
+                     .input(downloaded_audio_file)
                      .output(full_audio_file, acodec='pcm_s16le', ar='44100', ac=2)
                      .run(overwrite_output=True, capture_stderr=True))
                     os.remove(downloaded_audio_file)
@@ -159,76 +474,56 @@ def process_media(
         progress_callback("Media acquisition complete.", 15)
         
         # Step 3: AI Lyrics
+        # Transcription only needs full_audio.wav, so it runs alongside separation when the GPU has room
         subtitle_file = None
+        transcribe_args = None
+        transcribe_future = None
         if generate_lyrics and export_mode == "Video":
-            check_cancel(cancel_flag); progress_callback(f"Step 3/8: Transcribing lyrics with '{whisper_model}' model...", 18)
-            model = stable_whisper.load_model(whisper_model, device=device)
-            result = model.transcribe(full_audio_file, fp16=torch.cuda.is_available())
-            subtitle_file = os.path.join(temp_processing_dir, 'lyrics.ass')
-            _generate_karaoke_subtitles(result, subtitle_file, karaoke_styles)
-            progress_callback("Transcription complete.", 25)
-
-        # ... (Step 4: Split Audio and Step 5: Demucs Separation are unchanged) ...
-        check_cancel(cancel_flag); progress_callback("Step 4/8: Splitting audio...", 25)
-        duration = float(ffmpeg.probe(full_audio_file)['format']['duration'])
-        num_chunks = math.ceil(duration / CHUNK_DURATION_SECONDS) or 1
-        chunks_dir = os.path.join(temp_processing_dir, 'chunks')
-        os.makedirs(chunks_dir, exist_ok=True)
-        for i in range(num_chunks):
-            (ffmpeg.input(full_audio_file, ss=i * CHUNK_DURATION_SECONDS, t=CHUNK_DURATION_SECONDS)
-             .output(os.path.join(chunks_dir, f'chunk_{i:03d}.wav')).run(overwrite_output=True, quiet=True))
-        progress_callback("Splitting complete.", 30)
-
-        check_cancel(cancel_flag); progress_callback(f"Step 5/8: Separating all stems...", 30)
+            check_cancel(cancel_flag); progress_callback(f"Step 3/7: Transcribing lyrics with '{whisper_model}' model...", 18)
+            # Whisper works on 16 kHz mono, so it gets a smaller copy instead of the 44.1 kHz stereo master
+            whisper_audio_file = os.path.join(temp_processing_dir, 'full_audio_16k.wav')
+            try:
+                (ffmpeg
+                 .input(full_audio_file)
+                 .output(whisper_audio_file, acodec='pcm_s16le', ar='16000', ac=1)
+                 .run(overwrite_output=True, capture_stderr=True))
+            except ffmpeg.Error as e:
+                raise ProcessingError("FFmpeg failed while preparing audio for transcription.", e.stderr.decode('utf-8', errors='ignore'))
+            transcribe_args = (whisper_audio_file, whisper_model, device, cancel_flag, stop_lyrics)
+            lyrics_executor = ThreadPoolExecutor(max_workers=1)
+            if _can_overlap_whisper(whisper_model, device):
+                progress_callback("Transcribing in the background while stems are separated...", 19)
+                transcribe_future = lyrics_executor.submit(_transcribe, *transcribe_args)
+            else:
+                progress_callback("Not enough free VRAM to run Whisper alongside Demucs; transcribing after separation.", 19)
+
+        # Step 4: Demucs Separation
+        # Demucs segments long inputs internally, so the whole track is separated in one run
+        check_cancel(cancel_flag); progress_callback(f"Step 4/7: Separating all stems...", 30)
         separated_dir = os.path.join(temp_processing_dir, 'separated')
-        chunk_files = [str(f) for f in Path(chunks_dir).glob('*.wav')]
-        # htdemucs is the default model name used by demucs output folders
-        model_output_dir = os.path.join(separated_dir, "htdemucs") 
-        command = [sys.executable, '-m', 'demucs', '--out', separated_dir, '--device', device] + chunk_files
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, universal_newlines=True, encoding='utf-8', errors='ignore')
-        progress_regex = re.compile(r'(\d+)%\|')
-        chunks_processed, last_percentage = 0, 0
-        for line in iter(process.stderr.readline, ''):
-            if match := progress_regex.search(line):
-                percentage = int(match.group(1))
-                if percentage < last_percentage and last_percentage > 95: chunks_processed = min(chunks_processed + 1, num_chunks)
-                last_percentage = percentage
-                overall_progress = 30 + ((chunks_processed + (percentage / 100)) / num_chunks) * 40
-                progress_callback(f"AI Separation (Chunk {chunks_processed + 1}/{num_chunks}) - {percentage}%", overall_progress)
-        process.wait()
-        if process.returncode != 0: raise ProcessingError("Demucs failed.", process.stderr.read())
+        stem_dir = os.path.join(separated_dir, DEMUCS_MODEL_NAME, Path(full_audio_file).stem)
+        progress_callback("AI Separation in progress...", -1)
+        try:
+            _separate_stems(full_audio_file, stem_dir, device, cancel_flag)
+        except RuntimeError as e:
+            raise ProcessingError("Demucs failed.", str(e))
+        stem_paths = {s: os.path.join(stem_dir, f'{s}.wav') for s in stems}
         progress_callback("AI separation complete.", 70)
+        if transcribe_args is not None and transcribe_future is None:
+            # Demucs is done; hand its cached activation memory back before Whisper starts
+            torch.cuda.empty_cache()
+            transcribe_future = lyrics_executor.submit(_transcribe, *transcribe_args)
 
-        # ... (Step 6: Mix and Merge Stems is unchanged, it is robust) ...
-        check_cancel(cancel_flag); progress_callback("Step 6/8: Mixing audio stems...", 75)
-        mixed_chunks_dir = os.path.join(temp_processing_dir, 'mixed_chunks')
-        os.makedirs(mixed_chunks_dir, exist_ok=True)
-        for i in range(num_chunks):
-            chunk_name = f'chunk_{i:03d}'
-            stem_paths = {s: os.path.join(model_output_dir, chunk_name, f'{s}.wav') for s in stems}
-            valid_stems = [s for s in stems if os.path.exists(stem_paths[s]) and stem_volumes.get(s, 0) > 0]
-            if not valid_stems:
-                (ffmpeg.input('anullsrc', format='lavfi', t=CHUNK_DURATION_SECONDS, r=44100)
-                 .output(os.path.join(mixed_chunks_dir, f'mixed_{chunk_name}.wav')).run(overwrite_output=True, quiet=True))
-                continue
-            inputs_with_filter = [ffmpeg.input(stem_paths[s]).filter('volume', stem_volumes[s]) for s in valid_stems]
-            mixed_output = ffmpeg.filter(inputs_with_filter, 'amix', inputs=len(valid_stems), duration='longest')
-            mixed_output.output(os.path.join(mixed_chunks_dir, f'mixed_{chunk_name}.wav')).run(overwrite_output=True, quiet=True)
-        
-        progress_callback("Merging mixed chunks...", 80)
-        mixed_audio_path = os.path.join(temp_processing_dir, 'mixed_audio.wav')
-        mixed_chunk_files = sorted(Path(mixed_chunks_dir).glob('*.wav'))
-        if not mixed_chunk_files: raise FileNotFoundError("No mixed audio chunks found for merging.")
-        concat_list_file = os.path.join(temp_processing_dir, 'concat_list.txt')
-        with open(concat_list_file, 'w', encoding='utf-8') as f:
-            for file in mixed_chunk_files: f.write(f"file '{file.as_posix()}'\n")
-        (ffmpeg.input(concat_list_file, format='concat', safe=0)
-         .output(mixed_audio_path).run(overwrite_output=True, quiet=True))
-
-        # Step 7: Apply Audio Effects (to the master mixed audio)
-        final_audio_stream = ffmpeg.input(mixed_audio_path)
-        if normalize_volume or pitch_shift != 0 or speed_multiplier != 1.0:
-             check_cancel(cancel_flag); progress_callback("Step 7/8: Applying audio effects...", 85)
+        # Step 5: Mix Stems
+        # The mix and effects are one filtergraph, rendered by the export step in a single ffmpeg pass
+        check_cancel(cancel_flag); progress_callback("Step 5/7: Mixing audio stems...", 75)
+        valid_stems = [s for s, path in stem_paths.items() if os.path.exists(path) and stem_volumes.get(s, 0) > 0]
+        final_audio_stream = _mix_stems(valid_stems, stem_paths, stem_volumes, full_audio_file)
+
+        # Step 6: Apply Audio Effects (to the master mix)
+        effects_enabled = normalize_volume or pitch_shift != 0 or speed_multiplier != 1.0
+        if effects_enabled:
+             check_cancel(cancel_flag); progress_callback("Step 6/7: Applying audio effects...", 85)
              if normalize_volume:
                  final_audio_stream = final_audio_stream.filter('loudnorm')
              if pitch_shift != 0:
@@ -242,10 +537,15 @@ def process_media(
             final_audio_path = os.path.join(output_dir_base, f"{video_title}_Remixed.{export_format}")
             progress_callback(f"Exporting final audio to {final_audio_path}", 90)
             audio_codec = get_audio_codec(export_format)
-            try:
-                final_audio_stream.output(final_audio_path, acodec=audio_codec).run(overwrite_output=True, capture_stderr=True)
-            except ffmpeg.Error as e:
-                raise ProcessingError("FFmpeg failed while exporting final audio.", e.stderr.decode('utf-8', errors='ignore'))
+            if (not effects_enabled and export_format.lower() == "wav" and len(valid_stems) == 1
+                    and _is_unity(stem_volumes[valid_stems[0]])):
+                # The export would be a sample-exact copy of the separated 16-bit stem
+                shutil.copyfile(stem_paths[valid_stems[0]], final_audio_path)
+            else:
+                try:
+                    _run_ffmpeg(final_audio_stream.output(final_audio_path, acodec=audio_codec), cancel_flag, final_audio_path)
+                except ffmpeg.Error as e:
+                    raise ProcessingError("FFmpeg failed while exporting final audio.", e.stderr.decode('utf-8', errors='ignore'))
             progress_callback(f"✅ Success! Audio saved to {final_audio_path}", 100)
             return
 
@@ -253,44 +553,84 @@ def process_media(
             stem_out_dir = os.path.join(output_dir_base, f"{video_title}_stems")
             os.makedirs(stem_out_dir, exist_ok=True)
             audio_codec = get_audio_codec(export_format)
-            for stem in stems_to_export:
-                check_cancel(cancel_flag); progress_callback(f"Exporting stem: {stem}...", 90)
-                stem_files = sorted(Path(model_output_dir).rglob(f"*/{stem}.wav"))
-                if not stem_files: continue
-                concat_list_file = os.path.join(temp_processing_dir, f"concat_{stem}.txt")
-                with open(concat_list_file, 'w', encoding='utf-8') as f:
-                    for file in stem_files: f.write(f"file '{file.as_posix()}'\n")
-                stem_out_file = os.path.join(stem_out_dir, f"{video_title}_{stem}.{export_format}")
+            stems_found = [stem for stem in stems_to_export if os.path.exists(stem_paths[stem])]
+            check_cancel(cancel_flag); progress_callback(f"Exporting stems: {', '.join(stems_found)}...", 90)
+            # One encoder per stem, each capped at two threads so they share the CPU evenly
+            with ThreadPoolExecutor(max_workers=max(1, len(stems_found))) as ex:
+                futures = {ex.submit(_export_stem, stem, stem_paths[stem],
+                                     os.path.join(stem_out_dir, f"{video_title}_{stem}.{export_format}"),
+                                     audio_codec, cancel_flag): stem
+                           for stem in stems_found}
                 try:
-                    (ffmpeg.input(concat_list_file, format='concat', safe=0)
-                     .output(stem_out_file, acodec=audio_codec).run(overwrite_output=True, capture_stderr=True))
-                except ffmpeg.Error as e:
-                    raise ProcessingError(f"FFmpeg failed while exporting {stem} stem.", e.stderr.decode('utf-8', errors='ignore'))
+                    for future in as_completed(futures):
+                        check_cancel(cancel_flag)
+                        future.result()
+                        progress_callback(f"Exported stem: {futures[future]}", 90)
+                except CancelledError:
+                    # Running encodes stop on their own cancel poll; queued ones are dropped here
+                    for future in futures:
+                        future.cancel()
+                    raise
             progress_callback(f"✅ Success! Stems exported to {stem_out_dir}", 100)
             return
 
-        # Step 8: Final Merge (Video Mode)
-        progress_callback("Step 8/8: Merging final video...", 95)
+        if transcribe_future is not None:
+            progress_callback("Waiting for lyrics transcription...", 92)
+            result = transcribe_future.result()
+            check_cancel(cancel_flag)
+            subtitle_file = os.path.join(temp_processing_dir, 'lyrics.ass')
+            _generate_karaoke_subtitles(result, subtitle_file, karaoke_styles)
+            progress_callback("Transcription complete.", 94)
+
+        # Step 7: Final Merge (Video Mode)
+        progress_callback("Step 7/7: Merging final video...", 95)
         final_video_path = os.path.join(output_dir_base, f"{video_title}_Remixed.mp4")
         input_video = ffmpeg.input(str(video_stream_file))
         
         output_audio = final_audio_stream
         output_video = input_video['v']
+        subtitle_opts = {}
+        extra_streams = []
+        needs_reencode = False
         
         if speed_multiplier != 1.0:
+            needs_reencode = True
             output_video = output_video.filter('setpts', f'{1.0/speed_multiplier}*PTS')
             
         if subtitle_file and os.path.exists(subtitle_file):
-            progress_callback("Burning subtitles into video...", 97)
-            output_video = output_video.filter('ass', filename=str(Path(subtitle_file).as_posix()))
+            if burn_subtitles:
+                needs_reencode = True
+                progress_callback("Burning subtitles into video...", 97)
+                output_video = output_video.filter('ass', filename=str(Path(subtitle_file).as_posix()))
+            else:
+                # A soft subtitle track needs no per-frame rendering, so the video can still be copied
+                progress_callback("Adding lyrics as a subtitle track...", 97)
+                extra_streams.append(ffmpeg.input(subtitle_file))
+                subtitle_opts['scodec'] = 'mov_text'
         
-        try:
-            (ffmpeg
-             .output(output_video, output_audio, final_video_path,
-                     vcodec='libx264', pix_fmt='yuv420p', acodec='aac', audio_bitrate='320k', shortest=None)
-             .run(overwrite_output=True, capture_stderr=True))
-        except ffmpeg.Error as e:
-            raise ProcessingError("FFmpeg failed during final video merge.", e.stderr.decode('utf-8', errors='ignore'))
+        # A listed hardware encoder can still fail to open (e.g. driver missing), so each is tried in turn
+        if video_encoder:
+            encoders = [(video_encoder, dict(VIDEO_ENCODERS).get(video_encoder, {}))]
+            if video_encoder != 'libx264':
+                encoders.append(('libx264', {}))
+        else:
+            encoders = list(_available_vcodecs())
+        if not needs_reencode:
+            # No video filters: only the audio track changes, so try copying the frames first.
+            # The encoders stay as a fallback for source codecs MP4 cannot hold.
+            encoders.insert(0, ('copy', {}))
+        for i, (vcodec, vcodec_opts) in enumerate(encoders):
+            output_opts = {} if vcodec == 'copy' else {'pix_fmt': 'yuv420p', **vcodec_opts}
+            try:
+                _run_ffmpeg(ffmpeg.output(output_video, output_audio, *extra_streams, final_video_path,
+                                          vcodec=vcodec, acodec='aac', audio_bitrate='320k', shortest=None,
+                                          **output_opts, **subtitle_opts),
+                            cancel_flag, final_video_path)
+                break
+            except ffmpeg.Error as e:
+                if i == len(encoders) - 1:
+                    raise ProcessingError("FFmpeg failed during final video merge.", e.stderr.decode('utf-8', errors='ignore'))
+                progress_callback(f"{vcodec} encoder failed, retrying with {encoders[i + 1][0]}...", 97)
         
         progress_callback(f"✅ Success! Final video saved to {final_video_path}", 100)
 
@@ -303,6 +643,10 @@ def process_media(
         progress_callback(error_message, 100)
         raise e # Re-raise for the UI to catch
     finally:
+        if lyrics_executor is not None:
+            # Whisper may still be reading from the temp directory; stop it rather than wait it out
+            stop_lyrics.set()
+            lyrics_executor.shutdown(wait=True, cancel_futures=True)
         if temp_processing_dir and os.path.exists(temp_processing_dir):
             try:
                 shutil.rmtree(temp_processing_dir)